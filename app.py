@@ -1,14 +1,33 @@
-from flask import Flask, jsonify, send_file, request, make_response
+from flask import Flask, Response, jsonify, send_file, request, make_response
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from pydrive.auth import GoogleAuth
-from pydrive.drive import GoogleDrive
+from oauth2client.client import OAuth2Credentials
+from googleapiclient.discovery import build
+from googleapiclient.http import MediaFileUpload
+import httplib2
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cachetools import LRUCache, TTLCache
+import orjson
 import os
 import io
+import re
 import json
 import tempfile
+import hashlib
+import uuid
+import unicodedata
+from urllib.parse import quote
+import random
+import time
 from datetime import datetime
 import logging
 import sys
+import threading
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # Add models directory to path for imports
@@ -19,8 +38,7 @@ ML_MODEL_AVAILABLE = False
 classify_image = None
 
 try:
-    import predict
-    classify_image = predict.classify_image
+    from predict import classify_image
     ML_MODEL_AVAILABLE = True
     print("✅ ML model (predict.py) loaded successfully")
 except Exception as e:
@@ -28,7 +46,21 @@ except Exception as e:
     import traceback
     traceback.print_exc()
 
+class OrjsonProvider(JSONProvider):
+    """Serialize JSON responses with orjson, which is much faster on large item listings"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app, origins=[
     "http://localhost:5173",
     "http://localhost:3000", 
@@ -37,13 +69,141 @@ CORS(app, origins=[
     "https://frontend-3scf.vercel.app"
 ]) # Enable CORS for React frontend
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Behind nginx/apache with X-Sendfile enabled, let the proxy send cached files itself.
+# Otherwise send_file hands file paths to the WSGI server's wsgi.file_wrapper (sendfile(2) under gunicorn).
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() == 'true'
+
+# Configure logging; set LOG_LEVEL=WARNING in production to drop the per-request INFO lines
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
+# Shared pool for Drive downloads; capped to stay well under Drive's per-user rate limit
+DRIVE_DOWNLOAD_WORKERS = 8
+# Created once per process; each worker thread keeps its own authorized Http (see _thread_http)
+DRIVE_POOL = ThreadPoolExecutor(max_workers=DRIVE_DOWNLOAD_WORKERS, thread_name_prefix='drive-io')
+# Refreshed OAuth credentials are persisted off the request path, one write at a time
+CREDENTIALS_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix='credentials-writer')
+
+@atexit.register
+def shutdown_pools():
+    DRIVE_POOL.shutdown(wait=False, cancel_futures=True)
+    # Let a pending credentials write finish so a refreshed token is not lost
+    CREDENTIALS_WRITER.shutdown(wait=True)
+
+DRIVE_API_URL = 'https://www.googleapis.com/drive/v2'
+DRIVE_HTTP_TIMEOUT = 30
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Exponential backoff for downloads rejected by Drive's rate limiter
+DOWNLOAD_MAX_RETRIES = 5
+DOWNLOAD_MAX_BACKOFF = 32
+# On-disk httplib2 cache so repeated metadata queries can be answered with 304s
+DRIVE_HTTP_CACHE_DIR = '.httpcache'
+# Largest page size Drive v2 allows for files.list
+DRIVE_PAGE_SIZE = 1000
+# Parent folders OR-ed into a single files.list query
+FOLDERS_PER_QUERY = 50
+
+# Partial responses: only request the file fields the endpoints actually read
+FOLDER_SEARCH_FIELDS = 'items(id,title)'
+FOLDER_FILES_FIELDS = 'items(id,title,mimeType,downloadUrl,modifiedDate,parents(id)),nextPageToken'
+FOLDER_LIST_FIELDS = 'items(id,title,modifiedDate),nextPageToken'
+ITEM_DETAIL_FIELDS = 'items(id,title,mimeType,createdDate,modifiedDate,parents),nextPageToken'
+
+FILE_METADATA_FIELDS = 'id,title,mimeType,modifiedDate'
+
+# Local copies of Drive file content, keyed by (file_id, modifiedDate)
+FILE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'files')
+FILE_CACHE_MAX_BYTES = int(os.environ.get('FILE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# Single-file slots of a BAT folder, by lowercase extension: (name fragment, slot) pairs tried in order,
+# so a name matching several keeps the first slot. "spectogram" is a common misspelling.
+FILE_SLOTS = {
+    '.jpg': (('spectrogram', 'spectrogram'), ('spectogram', 'spectrogram'), ('camera', 'camera')),
+    '.txt': (('sensor', 'sensor'),),
+    '.wav': (('audio', 'audio'),)
+}
+
+# Content types served by /api/file, by lowercase file extension
+MIME_MAP = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.txt': 'text/plain',
+    '.wav': 'audio/wav'
+}
+
+# Organized /api/bat/<id>/files payloads, so frontend polling bursts reuse one Drive lookup.
+# Striped locks make concurrent misses for the same BAT wait for a single upstream call.
+BAT_FILES_CACHE = TTLCache(maxsize=512, ttl=30)
+BAT_FILES_CACHE_LOCK = threading.Lock()
+BAT_FILES_LOAD_LOCKS = [threading.Lock() for _ in range(64)]
+
+# Model predictions per spectrogram revision, keyed by (file_id, modifiedDate).
+# A re-uploaded spectrogram gets a new modifiedDate, so stale entries are never hit.
+PREDICTION_CACHE = LRUCache(maxsize=4096)
+PREDICTION_CACHE_LOCK = threading.Lock()
+
+# Title of a BAT folder: SERVER{server}_CLIENT{client}_{bat_id}
+BAT_FOLDER_TITLE = re.compile(r'^SERVER(?P<server>[^_]+)_CLIENT(?P<client>[^_]+)_(?P<bat_id>.+)$')
+
+ALL_FOLDERS_QUERY = "mimeType='application/vnd.google-apps.folder' and trashed=false"
+ROOT_ITEMS_QUERY = "'root' in parents and trashed=false"
+
+# Keep-alive session for raw file content downloads, shared by all requests
+# Size the pool for every thread that can download at once: request threads plus the Drive pool
+DRIVE_SESSION_POOL_SIZE = int(os.environ.get('DRIVE_SESSION_POOL_SIZE', 32))
+DRIVE_SESSION = requests.Session()
+DRIVE_SESSION.mount('https://www.googleapis.com/', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=DRIVE_SESSION_POOL_SIZE,
+    # Reconnect transparently when Google closes an idle keep-alive connection
+    max_retries=Retry(total=3, connect=3, read=2, status=0, backoff_factor=0.2, allowed_methods=['GET'])
+))
+
+def env_json(name):
+    """Parse a JSON document supplied through the environment, or None if it is absent or invalid"""
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError as e:
+        logger.error("%s is not valid JSON: %s", name, e)
+        return None
+
+def client_config_settings(client_secrets):
+    """Flatten a client_secrets.json document into the client_config pydrive reads from its settings"""
+    client_info = client_secrets.get('installed') or client_secrets.get('web') or client_secrets
+    return {
+        'client_id': client_info['client_id'],
+        'client_secret': client_info['client_secret'],
+        'auth_uri': client_info['auth_uri'],
+        'token_uri': client_info['token_uri'],
+        'revoke_uri': client_info.get('revoke_uri'),
+        'redirect_uri': client_info['redirect_uris'][0]
+    }
+
+# OAuth documents supplied through the environment, parsed once at import and kept in memory
+CLIENT_SECRETS = env_json('CLIENT_SECRETS_JSON')
+CREDENTIALS = env_json('CREDENTIALS_JSON')
+
 class GoogleDriveService:
     def __init__(self):
-        self.drive = None
+        self.gauth = None
+        self.service = None
+        # httplib2.Http is not thread-safe, so every worker thread gets its own
+        self._local = threading.local()
+        # Serializes token refreshes between request threads
+        self._auth_lock = threading.Lock()
+        # Folder id resolution and folder listings, keyed by (server, client, bat_id) and folder id
+        self._cache_lock = threading.Lock()
+        # Folder ids never change for a given name, so hits live long; misses are retried soon
+        self._folder_cache = TTLCache(maxsize=4096, ttl=3600)
+        self._missing_folder_cache = TTLCache(maxsize=4096, ttl=60)
+        # Files keep landing in BAT folders, so listings expire quickly
+        self._listing_cache = TTLCache(maxsize=2048, ttl=60)
+        self._metadata_cache = TTLCache(maxsize=4096, ttl=60)
         self.initialize_drive()
     
     def initialize_drive(self):
@@ -52,56 +212,36 @@ class GoogleDriveService:
             logger.info("Starting Google Drive initialization...")
             
             # Debug: Check environment variables
-            client_secrets_env = os.environ.get('CLIENT_SECRETS_JSON')
-            credentials_env = os.environ.get('CREDENTIALS_JSON')
             flask_env = os.environ.get('FLASK_ENV')
             
-            logger.info(f"Environment check:")
-            logger.info(f"- FLASK_ENV: {flask_env}")
-            logger.info(f"- CLIENT_SECRETS_JSON present: {bool(client_secrets_env)}")
-            logger.info(f"- CREDENTIALS_JSON present: {bool(credentials_env)}")
+            logger.info("Environment check:")
+            logger.info("- FLASK_ENV: %s", flask_env)
+            logger.info("- CLIENT_SECRETS_JSON present: %s", bool(CLIENT_SECRETS))
+            logger.info("- CREDENTIALS_JSON present: %s", bool(CREDENTIALS))
             
             gauth = GoogleAuth()
+            # Reuse one keep-alive transport for the auth flow and token refreshes
+            gauth.http = httplib2.Http(cache=DRIVE_HTTP_CACHE_DIR, timeout=DRIVE_HTTP_TIMEOUT)
             
             # Check if we have client secrets in environment variable
-            if client_secrets_env:
-                logger.info("Creating client_secrets.json from environment variable")
-                # Create client_secrets.json from environment variable
-                with open('client_secrets.json', 'w') as f:
-                    if isinstance(client_secrets_env, str):
-                        # If it's a JSON string, parse it first
-                        try:
-                            client_secrets_data = json.loads(client_secrets_env)
-                            json.dump(client_secrets_data, f)
-                        except json.JSONDecodeError:
-                            # If it's not valid JSON, write it as is
-                            f.write(client_secrets_env)
-                    else:
-                        json.dump(client_secrets_env, f)
-                logger.info("Created client_secrets.json from environment variable")
+            if CLIENT_SECRETS:
+                # Hand the client config to pydrive directly instead of writing client_secrets.json
+                gauth.settings['client_config_backend'] = 'settings'
+                gauth.settings['client_config'] = client_config_settings(CLIENT_SECRETS)
+                logger.info("Loaded client config from environment variable")
             else:
                 logger.warning("CLIENT_SECRETS_JSON environment variable not found")
             
             # Check if we have credentials in environment variable
-            if credentials_env:
-                logger.info("Creating credentials.json from environment variable")
-                # Create credentials.json from environment variable
-                with open('credentials.json', 'w') as f:
-                    if isinstance(credentials_env, str):
-                        try:
-                            credentials_data = json.loads(credentials_env)
-                            json.dump(credentials_data, f)
-                        except json.JSONDecodeError:
-                            f.write(credentials_env)
-                    else:
-                        json.dump(credentials_env, f)
-                logger.info("Created credentials.json from environment variable")
+            if CREDENTIALS:
+                gauth.credentials = OAuth2Credentials.from_json(json.dumps(CREDENTIALS))
+                logger.info("Loaded credentials from environment variable")
             else:
                 logger.warning("CREDENTIALS_JSON environment variable not found")
+                # Try to load saved credentials
+                gauth.LoadCredentialsFile("credentials.json")
             
-            # Try to load saved credentials
-            gauth.LoadCredentialsFile("credentials.json")
-            
+            self.gauth = gauth
             if gauth.credentials is None:
                 # Authenticate if credentials are not available
                 logger.info("No credentials found. Starting authentication flow...")
@@ -111,22 +251,30 @@ class GoogleDriveService:
                     raise Exception("Production deployment requires pre-authenticated credentials")
                 else:
                     gauth.LocalWebserverAuth()
+                    # Save the new credentials to file for the next start
+                    gauth.SaveCredentialsFile("credentials.json")
             elif gauth.access_token_expired:
                 # Refresh credentials if expired
                 logger.info("Credentials expired. Refreshing...")
                 gauth.Refresh()
+                CREDENTIALS_WRITER.submit(self._save_credentials)
             else:
                 # Initialize the saved credentials
                 gauth.Authorize()
-                
-            # Save the current credentials to file
-            gauth.SaveCredentialsFile("credentials.json")
             
-            self.drive = GoogleDrive(gauth)
+            # Raw Drive v2 client for all metadata calls; GoogleAuth only handles OAuth.
+            # The discovery document bundled with google-api-python-client is used, so building
+            # the client costs no network round trip at startup.
+            self.service = build(
+                'drive', 'v2',
+                http=self._thread_http(),
+                cache_discovery=False,
+                static_discovery=True
+            )
             logger.info("Google Drive initialized successfully")
             
         except Exception as e:
-            logger.error(f"Failed to initialize Google Drive: {e}")
+            logger.error("Failed to initialize Google Drive: %s", e)
             logger.error("Please ensure you have:")
             logger.error("1. Created client_secrets.json with your Google API credentials")
             logger.error("2. Enabled Google Drive API in Google Cloud Console")
@@ -138,112 +286,457 @@ class GoogleDriveService:
         Search for folder with pattern: SERVER{server_num}_CLIENT{client_num}_{bat_id}
         """
         folder_name = f"SERVER{server_num}_CLIENT{client_num}_{bat_id}"
+        cache_key = self._folder_cache_key(server_num, client_num, bat_id)
+        
+        with self._cache_lock:
+            folder = self._folder_cache.get(cache_key)
+            if folder is None and cache_key in self._missing_folder_cache:
+                return None
+        if folder is not None:
+            return folder
         
         try:
             # Search for folders with the exact name
             query = f"title='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            file_list = self.drive.ListFile({'q': query}).GetList()
+            # Only the first match is used, so ask for a single result and skip pagination
+            file_list = self.service.files().list(
+                q=query, fields=FOLDER_SEARCH_FIELDS, maxResults=1
+            ).execute(http=self._thread_http()).get('items', [])
             
             if file_list:
-                logger.info(f"Found folder: {folder_name}")
-                return file_list[0]  # Return first matching folder
+                logger.info("Found folder: %s", folder_name)
+                # Keep only the immutable id/title of the first matching folder
+                folder = {'id': file_list[0]['id'], 'title': file_list[0]['title']}
+                with self._cache_lock:
+                    self._folder_cache[cache_key] = folder
+                return folder
             else:
-                logger.warning(f"No folder found with name: {folder_name}")
+                logger.warning("No folder found with name: %s", folder_name)
+                with self._cache_lock:
+                    self._missing_folder_cache[cache_key] = True
                 return None
                 
         except Exception as e:
-            logger.error(f"Error searching for folder {folder_name}: {e}")
+            logger.error("Error searching for folder %s: %s", folder_name, e)
             return None
     
+    @staticmethod
+    def _folder_cache_key(server_num, client_num, bat_id):
+        return (str(server_num), str(client_num), str(bat_id))
+    
+    def invalidate_bat_folder(self, server_num, client_num, bat_id):
+        """Forget the cached resolution of a BAT folder"""
+        cache_key = self._folder_cache_key(server_num, client_num, bat_id)
+        with self._cache_lock:
+            self._folder_cache.pop(cache_key, None)
+            self._missing_folder_cache.pop(cache_key, None)
+    
+    def invalidate_folder_files(self, folder_id):
+        """Forget the cached listing of a folder after its contents changed"""
+        with self._cache_lock:
+            self._listing_cache.pop(folder_id, None)
+    
+    def remember_bat_folders(self, folders):
+        """Seed the folder resolution cache from any listing that returned BAT folders"""
+        resolved = {}
+        for folder in folders:
+            match = BAT_FOLDER_TITLE.match(folder['title'])
+            if match:
+                cache_key = self._folder_cache_key(match['server'], match['client'], match['bat_id'])
+                # Like search_bat_folder, the first folder listed for a name wins
+                resolved.setdefault(cache_key, {'id': folder['id'], 'title': folder['title']})
+        
+        with self._cache_lock:
+            for cache_key, folder in resolved.items():
+                self._folder_cache[cache_key] = folder
+                self._missing_folder_cache.pop(cache_key, None)
+    
+    def find_bat_folder_files(self, server_num, client_num, bat_id):
+        """
+        Resolve a BAT folder and list its files. Returns (folder, files), or (None, [])
+        if the folder does not exist. With the folder id cached this is a single listing call.
+        """
+        folder = self.search_bat_folder(server_num, client_num, bat_id)
+        if not folder:
+            return None, []
+        return folder, self.get_folder_files(folder['id'])
+    
     def get_folder_files(self, folder_id):
         """Get all files in a specific folder"""
         try:
-            query = f"'{folder_id}' in parents and trashed=false"
-            file_list = self.drive.ListFile({'q': query}).GetList()
-            
-            files_info = []
+            return self.get_files_for_folders([folder_id])[folder_id]
+        except Exception as e:
+            logger.error("Error getting files from folder %s: %s", folder_id, e)
+            return []
+    
+    def get_files_for_folders(self, folder_ids):
+        """
+        Get the files of several folders at once, returned as {folder_id: [files]}.
+        Uncached folders are listed with one query per FOLDERS_PER_QUERY parents,
+        and the queries run concurrently on the Drive pool.
+        """
+        files_by_folder = {}
+        with self._cache_lock:
+            for folder_id in folder_ids:
+                files_info = self._listing_cache.get(folder_id)
+                if files_info is not None:
+                    files_by_folder[folder_id] = files_info
+        
+        missing_ids = [folder_id for folder_id in dict.fromkeys(folder_ids) if folder_id not in files_by_folder]
+        if not missing_ids:
+            return files_by_folder
+        
+        chunks = [missing_ids[i:i + FOLDERS_PER_QUERY] for i in range(0, len(missing_ids), FOLDERS_PER_QUERY)]
+        if len(chunks) == 1:
+            file_lists = [self._list_children(chunks[0])]
+        else:
+            file_lists = list(DRIVE_POOL.map(self._list_children, chunks))
+        
+        listed = {folder_id: [] for folder_id in missing_ids}
+        for file_list in file_lists:
             for file in file_list:
-                files_info.append({
+                file_info = {
                     'id': file['id'],
                     'name': file['title'],
                     'mimeType': file['mimeType'],
                     'downloadUrl': file.get('downloadUrl', ''),
                     'modifiedDate': file.get('modifiedDate', '')
-                })
-            
-            return files_info
-            
-        except Exception as e:
-            logger.error(f"Error getting files from folder {folder_id}: {e}")
-            return []
+                }
+                # A file can live in more than one of the requested folders
+                for parent in file.get('parents', []):
+                    if parent['id'] in listed:
+                        listed[parent['id']].append(file_info)
+        
+        with self._cache_lock:
+            self._listing_cache.update(listed)
+        files_by_folder.update(listed)
+        return files_by_folder
+    
+    def _list_children(self, folder_ids):
+        """List every non-trashed file whose parent is one of folder_ids"""
+        parents_clause = ' or '.join(f"'{folder_id}' in parents" for folder_id in folder_ids)
+        query = f"trashed=false and ({parents_clause})"
+        return self._execute_all_pages(self.service.files().list(
+            q=query, fields=FOLDER_FILES_FIELDS, maxResults=DRIVE_PAGE_SIZE
+        ))
+    
+    @staticmethod
+    def _folder_summary(folder):
+        return {
+            'id': folder['id'],
+            'name': folder['title'],
+            'modifiedDate': folder.get('modifiedDate', '')
+        }
+    
+    @staticmethod
+    def _item_detail(item):
+        return {
+            'id': item['id'],
+            'title': item['title'],
+            'mimeType': item.get('mimeType', 'unknown'),
+            'createdDate': item.get('createdDate', 'unknown'),
+            'modifiedDate': item.get('modifiedDate', 'unknown'),
+            'parents': item.get('parents', [])
+        }
+    
+    def _all_folders_request(self):
+        return self.service.files().list(
+            q=ALL_FOLDERS_QUERY, fields=FOLDER_LIST_FIELDS, maxResults=DRIVE_PAGE_SIZE
+        )
+    
+    def _root_items_request(self):
+        return self.service.files().list(
+            q=ROOT_ITEMS_QUERY, fields=ITEM_DETAIL_FIELDS, maxResults=DRIVE_PAGE_SIZE
+        )
     
     def list_all_folders(self):
         """List all folders in Google Drive to debug"""
         try:
-            query = "mimeType='application/vnd.google-apps.folder' and trashed=false"
-            file_list = self.drive.ListFile({'q': query}).GetList()
+            file_list = self._execute_all_pages(self._all_folders_request())
+            self.remember_bat_folders(file_list)
+            folders = [self._folder_summary(folder) for folder in file_list]
             
-            folders = []
-            for folder in file_list:
-                folders.append({
-                    'id': folder['id'],
-                    'name': folder['title'],
-                    'modifiedDate': folder.get('modifiedDate', '')
-                })
-            
-            logger.info(f"Found {len(folders)} folders in Google Drive")
+            logger.info("Found %s folders in Google Drive", len(folders))
             return folders
             
         except Exception as e:
-            logger.error(f"Error listing folders: {e}")
+            logger.error("Error listing folders: %s", e)
             return []
     
     def list_all_items_detailed(self):
         """List all items in Google Drive with detailed info for debugging"""
         try:
             # Get all items in root
-            query = "'root' in parents and trashed=false"
-            file_list = self.drive.ListFile({'q': query}).GetList()
-            
-            items = []
-            for item in file_list:
-                items.append({
-                    'id': item['id'],
-                    'title': item['title'],
-                    'mimeType': item.get('mimeType', 'unknown'),
-                    'createdDate': item.get('createdDate', 'unknown'),
-                    'modifiedDate': item.get('modifiedDate', 'unknown'),
-                    'parents': item.get('parents', [])
-                })
+            file_list = self._execute_all_pages(self._root_items_request())
+            items = [self._item_detail(item) for item in file_list]
             
-            logger.info(f"Found {len(items)} items in Google Drive root")
+            logger.info("Found %s items in Google Drive root", len(items))
             return items
             
         except Exception as e:
-            logger.error(f"Error listing all items: {e}")
+            logger.error("Error listing all items: %s", e)
             return []
-
-    def download_and_store_locally(self, file_id, file_name, local_folder):
-        """Download a file from Google Drive and store locally"""
+    
+    def get_debug_overview(self):
+        """
+        List all folders and all root items, sending the first page of both
+        queries to Drive as a single batch request.
+        """
         try:
-            # Create local storage directory if it doesn't exist
-            os.makedirs(local_folder, exist_ok=True)
+            list_requests = {
+                'folders': self._all_folders_request(),
+                'items': self._root_items_request()
+            }
+            responses = {}
+            errors = []
+            
+            def collect(request_id, response, exception):
+                if exception is not None:
+                    errors.append(exception)
+                else:
+                    responses[request_id] = response
             
-            file = self.drive.CreateFile({'id': file_id})
-            local_path = os.path.join(local_folder, file_name)
+            batch = self.service.new_batch_http_request(callback=collect)
+            for request_id, list_request in list_requests.items():
+                batch.add(list_request, request_id=request_id)
+            batch.execute(http=self._thread_http())
             
-            # Download the file
-            file.GetContentFile(local_path)
-            logger.info(f"Downloaded {file_name} to {local_path}")
+            if errors:
+                raise errors[0]
+            
+            folders = self._execute_all_pages(list_requests['folders'], responses['folders'])
+            items = self._execute_all_pages(list_requests['items'], responses['items'])
+            self.remember_bat_folders(folders)
+            
+            logger.info("Found %s folders and %s root items in Google Drive", len(folders), len(items))
+            return (
+                [self._folder_summary(folder) for folder in folders],
+                [self._item_detail(item) for item in items]
+            )
+            
+        except Exception as e:
+            logger.error("Error building debug overview: %s", e)
+            return [], []
+
+    def _ensure_fresh_credentials(self):
+        """Refresh an expired access token in memory; persisting it happens in the background"""
+        if not self.gauth.access_token_expired:
+            return
+        
+        with self._auth_lock:
+            # Another thread may have refreshed while we waited for the lock
+            if not self.gauth.access_token_expired:
+                return
+            logger.info("Access token expired. Refreshing...")
+            self.gauth.Refresh()
+        CREDENTIALS_WRITER.submit(self._save_credentials)
+    
+    def _save_credentials(self):
+        try:
+            self.gauth.SaveCredentialsFile("credentials.json")
+        except Exception as e:
+            logger.error("Failed to save refreshed credentials: %s", e)
+
+    def _thread_http(self):
+        """Return an authorized Http object owned by the calling thread"""
+        self._ensure_fresh_credentials()
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self.gauth.credentials.authorize(
+                httplib2.Http(cache=DRIVE_HTTP_CACHE_DIR, timeout=DRIVE_HTTP_TIMEOUT)
+            )
+            self._local.http = http
+        return http
+
+    def _execute_all_pages(self, list_request, response=None):
+        """Execute a files().list request (unless its first response is given) and follow nextPageToken"""
+        http = self._thread_http()
+        if response is None:
+            response = list_request.execute(http=http)
+        
+        items = list(response.get('items', []))
+        while True:
+            list_request = self.service.files().list_next(list_request, response)
+            if list_request is None:
+                return items
+            response = list_request.execute(http=http)
+            items.extend(response.get('items', []))
+
+    def open_file_stream(self, file_id):
+        """
+        Start a streaming download of a file's content over the shared session.
+        The caller is responsible for closing the returned response.
+        """
+        self._ensure_fresh_credentials()
+        access_token = self.gauth.credentials.access_token
+        response = DRIVE_SESSION.get(
+            f"{DRIVE_API_URL}/files/{file_id}",
+            params={'alt': 'media'},
+            headers={'Authorization': f'Bearer {access_token}'},
+            stream=True,
+            timeout=DRIVE_HTTP_TIMEOUT
+        )
+        try:
+            response.raise_for_status()
+        except Exception:
+            # Read the (small) error body before closing so callers can inspect the reason
+            response.content
+            response.close()
+            raise
+        return response
+
+    def get_file_metadata(self, file_id):
+        """Get id/title/mimeType/modifiedDate for a file, served from memory for hot ids"""
+        with self._cache_lock:
+            metadata = self._metadata_cache.get(file_id)
+        if metadata is not None:
+            return metadata
+        
+        metadata = self.service.files().get(
+            fileId=file_id, fields=FILE_METADATA_FIELDS
+        ).execute(http=self._thread_http())
+        with self._cache_lock:
+            self._metadata_cache[file_id] = metadata
+        return metadata
+
+    def download_to_path(self, file_id, local_path):
+        """Stream a file's content from Google Drive to local_path over the shared session"""
+        with self.open_file_stream(file_id) as response:
+            with open(local_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        return local_path
+
+    def upload_file(self, local_path, title, folder_id, mime_type):
+        """Upload a local file into a Drive folder as a resumable, chunked upload"""
+        media = MediaFileUpload(local_path, mimetype=mime_type, resumable=True, chunksize=UPLOAD_CHUNK_SIZE)
+        file_metadata = {
+            'title': title,
+            'parents': [{'id': folder_id}]
+        }
+        return self.service.files().insert(
+            body=file_metadata, media_body=media, fields='id'
+        ).execute(http=self._thread_http())
+
+    def download_and_store_locally(self, file_id, local_path):
+        """
+        Download a file from Google Drive and store it at local_path.
+        The parent directory must already exist. The file is written to a temporary
+        name and renamed into place, so concurrent downloads of files sharing a title
+        leave one complete copy instead of an interleaved one.
+        """
+        tmp_path = f"{local_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            for attempt in range(DOWNLOAD_MAX_RETRIES + 1):
+                try:
+                    self.download_to_path(file_id, tmp_path)
+                    break
+                except requests.HTTPError as e:
+                    if attempt == DOWNLOAD_MAX_RETRIES or not is_rate_limited(e.response):
+                        raise
+                    delay = min(2 ** attempt + random.random(), DOWNLOAD_MAX_BACKOFF)
+                    logger.warning("Rate limited downloading %s, retrying in %.1fs", file_id, delay)
+                    time.sleep(delay)
+            os.replace(tmp_path, local_path)
+            
+            logger.info("Downloaded %s to %s", file_id, local_path)
             
             return local_path
             
         except Exception as e:
-            logger.error(f"Error downloading file {file_id}: {e}")
+            logger.error("Error downloading file %s: %s", file_id, e)
             return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+def is_rate_limited(response):
+    """Whether a Drive error response asks the client to slow down"""
+    if response.status_code == 429:
+        return True
+    # Drive reports per-user quota as 403 with a rate limit reason
+    return response.status_code == 403 and (
+        'rateLimitExceeded' in response.text or 'userRateLimitExceeded' in response.text
+    )
+
+def cached_file_path(file_id, modified_date):
+    """Location of the cached content of a file revision"""
+    revision = hashlib.sha1(modified_date.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(FILE_CACHE_DIR, f"{file_id}_{revision}")
+
+def prune_file_cache():
+    """Evict least recently used cache entries until the cache fits in FILE_CACHE_MAX_BYTES"""
+    try:
+        entries = []
+        total_size = 0
+        for entry in os.scandir(FILE_CACHE_DIR):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+        
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= FILE_CACHE_MAX_BYTES:
+                break
+            os.remove(path)
+            total_size -= size
+    except OSError as e:
+        logger.warning("Error pruning file cache: %s", e)
+
+def content_disposition_names(file_name):
+    """
+    filename options for a Content-Disposition header, encoded the way send_file does:
+    non-ASCII names get an ASCII fallback plus an RFC 5987 filename* parameter
+    """
+    try:
+        file_name.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', file_name).encode('ascii', 'ignore').decode('ascii')
+        quoted = quote(file_name, safe="!#$&+^`|~")
+        return {'filename': simple, 'filename*': f"UTF-8''{quoted}"}
+    return {'filename': file_name}
+
+def stream_into_cache(upstream, cache_path):
+    """
+    Yield the upstream response body while writing it to cache_path.
+    The entry is published atomically once the whole body was received.
+    """
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    published = False
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in upstream.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                yield chunk
+        os.replace(tmp_path, cache_path)
+        published = True
+    finally:
+        upstream.close()
+        if not published and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    prune_file_cache()
+
+def fetch_into_cache(file_id, modified_date):
+    """Return the local path of a file revision, downloading it into the file cache if needed"""
+    cache_path = cached_file_path(file_id, modified_date)
+    if os.path.exists(cache_path):
+        os.utime(cache_path)  # Mark as recently used for eviction
+        return cache_path
+    
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        drive_service.download_to_path(file_id, tmp_path)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    prune_file_cache()
+    return cache_path
 
 # Initialize Google Drive service
 drive_service = GoogleDriveService()
+os.makedirs(FILE_CACHE_DIR, exist_ok=True)
 
 @app.route('/api/debug/folders')
 def list_all_folders():
@@ -256,7 +749,7 @@ def list_all_folders():
             'folders': folders
         })
     except Exception as e:
-        logger.error(f"Error listing folders: {e}")
+        logger.error("Error listing folders: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -273,7 +766,26 @@ def list_all_items():
             'items': items
         })
     except Exception as e:
-        logger.error(f"Error listing all items: {e}")
+        logger.error("Error listing all items: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/api/debug/overview')
+def debug_overview():
+    """Debug endpoint returning folders and root items from one batched Drive call"""
+    try:
+        folders, items = drive_service.get_debug_overview()
+        return jsonify({
+            'success': True,
+            'total_folders': len(folders),
+            'folders': folders,
+            'total_items': len(items),
+            'items': items
+        })
+    except Exception as e:
+        logger.error("Error building debug overview: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -290,8 +802,8 @@ def debug_download_files(bat_id):
         # Extract numeric part from BAT ID
         numeric_bat_id = bat_id.replace('BAT', '')
         
-        # Search for the folder
-        folder = drive_service.search_bat_folder(server_num, client_num, numeric_bat_id)
+        # Find the folder and its files
+        folder, files = drive_service.find_bat_folder_files(server_num, client_num, numeric_bat_id)
         
         if not folder:
             return jsonify({
@@ -299,20 +811,23 @@ def debug_download_files(bat_id):
                 'message': f'Folder not found for SERVER{server_num}_CLIENT{client_num}_{numeric_bat_id}'
             }), 404
         
-        # Get files in the folder
-        files = drive_service.get_folder_files(folder['id'])
-        
         # Create local storage folder
         local_folder = f"downloads/SERVER{server_num}_CLIENT{client_num}_{numeric_bat_id}"
+        os.makedirs(local_folder, exist_ok=True)
         downloaded_files = []
         
-        # Download all files
-        for file in files:
-            local_path = drive_service.download_and_store_locally(
-                file['id'], 
-                file['name'], 
-                local_folder
-            )
+        # Download all files in parallel
+        futures = {
+            DRIVE_POOL.submit(
+                drive_service.download_and_store_locally,
+                file['id'],
+                os.path.join(local_folder, file['name'])
+            ): file
+            for file in files
+        }
+        for future in as_completed(futures):
+            file = futures[future]
+            local_path = future.result()
             if local_path:
                 downloaded_files.append({
                     'original_name': file['name'],
@@ -329,12 +844,72 @@ def debug_download_files(bat_id):
         })
         
     except Exception as e:
-        logger.error(f"Error in debug download for BAT {bat_id}: {e}")
+        logger.error("Error in debug download for BAT %s: %s", bat_id, e)
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
+def classify_file(file_name):
+    """Return the single-file slot a BAT folder file belongs in, or None if it goes under 'other'"""
+    name = file_name.lower()
+    for fragment, slot in FILE_SLOTS.get(os.path.splitext(name)[1], ()):
+        if fragment in name:
+            return slot
+    return None
+
+def load_bat_files(server_num, client_num, numeric_bat_id):
+    """Find a BAT folder and organize its files by type; returns None if the folder does not exist"""
+    folder, files = drive_service.find_bat_folder_files(server_num, client_num, numeric_bat_id)
+    if not folder:
+        return None
+    
+    # Organize files by type
+    organized_files = {
+        'spectrogram': None,
+        'camera': None,
+        'sensor': None,
+        'audio': None,
+        'other': []
+    }
+    
+    for file in files:
+        slot = classify_file(file['name'])
+        if slot:
+            organized_files[slot] = file
+        else:
+            organized_files['other'].append(file)
+    
+    return {
+        'success': True,
+        'folder_name': folder['title'],
+        'folder_id': folder['id'],
+        'files': organized_files
+    }
+
+def get_cached_bat_files(server_num, client_num, numeric_bat_id):
+    """load_bat_files with a short-lived cache that coalesces concurrent misses"""
+    cache_key = (server_num, client_num, numeric_bat_id)
+    with BAT_FILES_CACHE_LOCK:
+        payload = BAT_FILES_CACHE.get(cache_key)
+    if payload is not None:
+        return payload
+    
+    with BAT_FILES_LOAD_LOCKS[hash(cache_key) % len(BAT_FILES_LOAD_LOCKS)]:
+        # A concurrent request may have loaded it while we waited
+        with BAT_FILES_CACHE_LOCK:
+            payload = BAT_FILES_CACHE.get(cache_key)
+        if payload is None:
+            payload = load_bat_files(server_num, client_num, numeric_bat_id)
+            if payload is not None:
+                with BAT_FILES_CACHE_LOCK:
+                    BAT_FILES_CACHE[cache_key] = payload
+    return payload
+
+def invalidate_bat_files(server_num, client_num, numeric_bat_id):
+    with BAT_FILES_CACHE_LOCK:
+        BAT_FILES_CACHE.pop((server_num, client_num, numeric_bat_id), None)
+
 @app.route('/api/bat/<bat_id>/files')
 def get_bat_files(bat_id):
     """Get all files for a specific BAT ID"""
@@ -346,50 +921,18 @@ def get_bat_files(bat_id):
         # Extract numeric part from BAT ID (e.g., BAT121 -> 121)
         numeric_bat_id = bat_id.replace('BAT', '')
         
-        # Search for the folder
-        folder = drive_service.search_bat_folder(server_num, client_num, numeric_bat_id)
+        payload = get_cached_bat_files(server_num, client_num, numeric_bat_id)
         
-        if not folder:
+        if not payload:
             return jsonify({
                 'success': False,
                 'message': f'Folder not found for SERVER{server_num}_CLIENT{client_num}_{numeric_bat_id}'
             }), 404
         
-        # Get files in the folder
-        files = drive_service.get_folder_files(folder['id'])
-        
-        # Organize files by type
-        organized_files = {
-            'spectrogram': None,
-            'camera': None,
-            'sensor': None,
-            'audio': None,
-            'other': []
-        }
-        
-        for file in files:
-            file_name_lower = file['name'].lower()
-            # Handle both "spectrogram" and "spectogram" (with missing 'r')
-            if ('spectrogram' in file_name_lower or 'spectogram' in file_name_lower) and file_name_lower.endswith('.jpg'):
-                organized_files['spectrogram'] = file
-            elif 'camera' in file_name_lower and file_name_lower.endswith('.jpg'):
-                organized_files['camera'] = file
-            elif 'sensor' in file_name_lower and file_name_lower.endswith('.txt'):
-                organized_files['sensor'] = file
-            elif 'audio' in file_name_lower and file_name_lower.endswith('.wav'):
-                organized_files['audio'] = file
-            else:
-                organized_files['other'].append(file)
-        
-        return jsonify({
-            'success': True,
-            'folder_name': folder['title'],
-            'folder_id': folder['id'],
-            'files': organized_files
-        })
+        return jsonify(payload)
         
     except Exception as e:
-        logger.error(f"Error getting files for BAT {bat_id}: {e}")
+        logger.error("Error getting files for BAT %s: %s", bat_id, e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -399,31 +942,39 @@ def get_bat_files(bat_id):
 def download_file_endpoint(file_id):
     """Download a specific file from Google Drive"""
     try:
-        file_name = request.args.get('name', 'file')
-        
-        # Download the file to temp location
-        file = drive_service.drive.CreateFile({'id': file_id})
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f"_{file_name}")
-        file.GetContentFile(temp_file.name)
+        metadata = drive_service.get_file_metadata(file_id)
+        file_name = request.args.get('name', metadata.get('title', 'file'))
         
         # Determine mime type based on file extension
-        mime_type = 'application/octet-stream'
-        if file_name.lower().endswith('.jpg') or file_name.lower().endswith('.jpeg'):
-            mime_type = 'image/jpeg'
-        elif file_name.lower().endswith('.png'):
-            mime_type = 'image/png'
-        elif file_name.lower().endswith('.txt'):
-            mime_type = 'text/plain'
-        
-        return send_file(
-            temp_file.name,
-            mimetype=mime_type,
-            as_attachment=False,
-            download_name=file_name
+        extension = os.path.splitext(file_name)[1].lower()
+        mime_type = MIME_MAP.get(extension, 'application/octet-stream')
+        
+        # Serve unchanged files from the local cache
+        cache_path = cached_file_path(file_id, metadata.get('modifiedDate', ''))
+        if os.path.exists(cache_path):
+            os.utime(cache_path)  # Mark as recently used for eviction
+            return send_file(
+                cache_path,
+                mimetype=mime_type,
+                as_attachment=False,
+                download_name=file_name
+            )
+        
+        # Otherwise pass the Drive response body through to the client, filling the cache on the way
+        upstream = drive_service.open_file_stream(file_id)
+        response = Response(
+            stream_into_cache(upstream, cache_path),
+            mimetype=mime_type
         )
+        response.call_on_close(upstream.close)
+        response.headers.set('Content-Disposition', 'inline', **content_disposition_names(file_name))
+        # iter_content decodes gzip, so the upstream length only holds for identity encoding
+        if 'Content-Length' in upstream.headers and 'Content-Encoding' not in upstream.headers:
+            response.headers['Content-Length'] = upstream.headers['Content-Length']
+        return response
         
     except Exception as e:
-        logger.error(f"Error downloading file {file_id}: {e}")
+        logger.error("Error downloading file %s: %s", file_id, e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -456,16 +1007,12 @@ def upload_sensor_file(bat_id):
             }), 404
         
         # Upload the file to Google Drive
-        file_metadata = {
-            'title': 'Sensor.txt',
-            'parents': [{'id': folder['id']}]
-        }
-        
-        file = drive_service.drive.CreateFile(file_metadata)
-        file.SetContentFile(sample_file_path)
-        file.Upload()
+        file = drive_service.upload_file(sample_file_path, 'Sensor.txt', folder['id'], 'text/plain')
         
-        logger.info(f"Uploaded Sensor.txt to folder {folder_name}")
+        logger.info("Uploaded Sensor.txt to folder %s", folder_name)
+        drive_service.invalidate_bat_folder(server_num, client_num, bat_id)
+        drive_service.invalidate_folder_files(folder['id'])
+        invalidate_bat_files(server_num, client_num, bat_id)
         
         return jsonify({
             'success': True,
@@ -475,7 +1022,7 @@ def upload_sensor_file(bat_id):
         })
         
     except Exception as e:
-        logger.error(f"Error uploading sensor file: {e}")
+        logger.error("Error uploading sensor file: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -487,7 +1034,7 @@ def health_check():
     return jsonify({
         'success': True,
         'message': 'Backend service is running',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now()  # orjson emits ISO 8601
     })
 
 # Mock species data for testing without Google Drive/Model
@@ -500,6 +1047,18 @@ MOCK_SPECIES_DATA = {
     '830': {'species': 'Unknown_species', 'confidence': 45.3},
 }
 
+# Mock responses never change, so serialize them once
+MOCK_RESPONSES = {
+    bat_id: orjson.dumps({
+        'success': True,
+        'species': prediction['species'],
+        'confidence': prediction['confidence'],
+        'bat_id': bat_id,
+        'mode': 'mock'
+    })
+    for bat_id, prediction in MOCK_SPECIES_DATA.items()
+}
+
 @app.route('/api/predict/<bat_id>', methods=['GET', 'POST'])
 def predict_species(bat_id):
     """
@@ -518,58 +1077,59 @@ def predict_species(bat_id):
         client = request.args.get('client', '1')
         use_mock = request.args.get('mock', 'false').lower() == 'true'
         
-        logger.info(f"Predicting species for BAT {bat_id} (Server {server}, Client {client}) - Mock: {use_mock}")
+        logger.info("Predicting species for BAT %s (Server %s, Client %s) - Mock: %s", bat_id, server, client, use_mock)
         
         # Check if mock data is explicitly requested
-        if use_mock and bat_id in MOCK_SPECIES_DATA:
-            mock_prediction = MOCK_SPECIES_DATA.get(bat_id, {
-                'species': 'Unknown_species',
-                'confidence': 50.0
-            })
-            logger.info(f"Using mock prediction: {mock_prediction['species']} ({mock_prediction['confidence']}%)")
+        if use_mock and bat_id in MOCK_RESPONSES:
+            mock_prediction = MOCK_SPECIES_DATA[bat_id]
+            logger.info("Using mock prediction: %s (%s%%)", mock_prediction['species'], mock_prediction['confidence'])
             
-            return jsonify({
-                'success': True,
-                'species': mock_prediction['species'],
-                'confidence': mock_prediction['confidence'],
-                'bat_id': bat_id,
-                'mode': 'mock'
-            })
+            return Response(MOCK_RESPONSES[bat_id], mimetype='application/json')
         
         # Try to get spectrogram from Google Drive
         spectrogram_path = None
+        prediction_key = None
+        # Only uploaded spectrograms are temporary; Drive ones live in the file cache
+        is_temporary = False
         try:
-            logger.info(f"Fetching spectrogram from Google Drive for BAT {bat_id}")
+            logger.info("Fetching spectrogram from Google Drive for BAT %s", bat_id)
             
             # Search for the BAT folder
             numeric_bat_id = bat_id.replace('BAT', '')
-            folder = drive_service.search_bat_folder(server, client, numeric_bat_id)
+            folder, files_in_folder = drive_service.find_bat_folder_files(server, client, numeric_bat_id)
             
             if folder:
-                # Get files in the folder
-                files_in_folder = drive_service.get_folder_files(folder['id'])
-                
                 # Find spectrogram file
                 spectrogram_file = None
                 for file in files_in_folder:
-                    file_name_lower = file['name'].lower()
-                    if ('spectrogram' in file_name_lower or 'spectogram' in file_name_lower) and file_name_lower.endswith('.jpg'):
+                    if classify_file(file['name']) == 'spectrogram':
                         spectrogram_file = file
                         break
                 
                 if spectrogram_file:
-                    # Download spectrogram
-                    gfile = drive_service.drive.CreateFile({'id': spectrogram_file['id']})
-                    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
-                        gfile.GetContentFile(tmp.name)
-                        spectrogram_path = tmp.name
-                        logger.info(f"Downloaded spectrogram to {spectrogram_path}")
+                    prediction_key = (spectrogram_file['id'], spectrogram_file['modifiedDate'])
+                    with PREDICTION_CACHE_LOCK:
+                        cached_prediction = PREDICTION_CACHE.get(prediction_key)
+                    if cached_prediction is not None:
+                        predicted_species, confidence = cached_prediction
+                        logger.info("Cached prediction: %s (%s%%)", predicted_species, confidence)
+                        return jsonify({
+                            'success': True,
+                            'species': predicted_species,
+                            'confidence': confidence,
+                            'bat_id': bat_id,
+                            'mode': 'ml_model'
+                        })
+                    
+                    # Reuse the cached copy of this spectrogram revision, downloading it only once
+                    spectrogram_path = fetch_into_cache(spectrogram_file['id'], spectrogram_file['modifiedDate'])
+                    logger.info("Spectrogram available at %s", spectrogram_path)
                 else:
-                    logger.warning(f"No spectrogram file found in folder {folder['title']}")
+                    logger.warning("No spectrogram file found in folder %s", folder['title'])
             else:
-                logger.warning(f"Folder not found for SERVER{server}_CLIENT{client}_{numeric_bat_id}")
+                logger.warning("Folder not found for SERVER%s_CLIENT%s_%s", server, client, numeric_bat_id)
         except Exception as e:
-            logger.warning(f"Failed to fetch spectrogram from Google Drive: {e}")
+            logger.warning("Failed to fetch spectrogram from Google Drive: %s", e)
         
         # If no spectrogram from Drive, try to get from POST request
         if not spectrogram_path and request.method == 'POST':
@@ -585,11 +1145,12 @@ def predict_species(bat_id):
             with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
                 file.save(tmp.name)
                 spectrogram_path = tmp.name
-                logger.info(f"Saved uploaded file to {spectrogram_path}")
+                is_temporary = True
+                logger.info("Saved uploaded file to %s", spectrogram_path)
         
         # If still no spectrogram, return error
         if not spectrogram_path:
-            logger.warning(f"No spectrogram found for BAT {bat_id} - returning Unknown species")
+            logger.warning("No spectrogram found for BAT %s - returning Unknown species", bat_id)
             return jsonify({
                 'success': False,
                 'message': f'No spectrogram found for BAT {bat_id}',
@@ -612,14 +1173,13 @@ def predict_species(bat_id):
                     'mode': 'error'
                 }), 500
             
-            logger.info(f"Running ML model prediction on {spectrogram_path}")
+            logger.info("Running ML model prediction on %s", spectrogram_path)
             predicted_species, confidence = classify_image(spectrogram_path)
             
-            # Clean up temp file
-            if os.path.exists(spectrogram_path):
-                os.remove(spectrogram_path)
-            
-            logger.info(f"ML Prediction: {predicted_species} ({confidence}%)")
+            logger.info("ML Prediction: %s (%s%%)", predicted_species, confidence)
+            if prediction_key is not None:
+                with PREDICTION_CACHE_LOCK:
+                    PREDICTION_CACHE[prediction_key] = (predicted_species, confidence)
             
             return jsonify({
                 'success': True,
@@ -630,7 +1190,7 @@ def predict_species(bat_id):
             })
         
         except Exception as e:
-            logger.error(f"Error running ML model: {e}", exc_info=True)
+            logger.error("Error running ML model: %s", e, exc_info=True)
             return jsonify({
                 'success': False,
                 'message': f'Prediction error: {str(e)}',
@@ -639,9 +1199,14 @@ def predict_species(bat_id):
                 'bat_id': bat_id,
                 'mode': 'error'
             }), 500
+        
+        finally:
+            # Clean up temp file
+            if is_temporary and os.path.exists(spectrogram_path):
+                os.remove(spectrogram_path)
     
     except Exception as e:
-        logger.error(f"Error predicting species: {e}", exc_info=True)
+        logger.error("Error predicting species: %s", e, exc_info=True)
         return jsonify({
             'success': False,
             'message': str(e),
@@ -649,6 +1214,47 @@ def predict_species(bat_id):
             'confidence': 0
         }), 500
 
+SPECIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bat_species')
+# Extensions tried for a species image, in order of preference
+SPECIES_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']
+
+def build_species_index():
+    """
+    Map species name -> (image file name, ETag) for SPECIES_DIR, or None if the
+    directory is missing. The ETag comes from the file's size and mtime, so the
+    images themselves are never read here.
+    """
+    if not os.path.isdir(SPECIES_DIR):
+        return None
+    
+    file_names = {}
+    for file_name in os.listdir(SPECIES_DIR):
+        stem, extension = os.path.splitext(file_name)
+        if extension not in SPECIES_IMAGE_EXTENSIONS:
+            continue
+        current = file_names.get(stem)
+        rank = SPECIES_IMAGE_EXTENSIONS.index(extension)
+        if current is None or rank < SPECIES_IMAGE_EXTENSIONS.index(os.path.splitext(current)[1]):
+            file_names[stem] = file_name
+    
+    index = {}
+    for stem, file_name in file_names.items():
+        stat = os.stat(os.path.join(SPECIES_DIR, file_name))
+        index[stem] = (file_name, f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+    return index
+
+SPECIES_INDEX = build_species_index()
+
+@app.route('/api/debug/species-index/rebuild', methods=['POST'])
+def rebuild_species_index():
+    """Debug endpoint to rescan bat_species after images were added or renamed"""
+    global SPECIES_INDEX
+    SPECIES_INDEX = build_species_index()
+    return jsonify({
+        'success': SPECIES_INDEX is not None,
+        'total_species': len(SPECIES_INDEX or {})
+    })
+
 @app.route('/api/species-image/<species_name>', methods=['GET', 'OPTIONS'])
 def get_species_image(species_name):
     """
@@ -665,66 +1271,47 @@ def get_species_image(species_name):
         response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
         return response, 204
     try:
-        # Get the backend directory
-        backend_dir = os.path.dirname(os.path.abspath(__file__))
-        species_dir = os.path.join(backend_dir, 'bat_species')
+        logger.info("Looking for species image: %s", species_name)
         
-        logger.info(f"Looking for species image: {species_name}")
-        logger.info(f"Species directory: {species_dir}")
-        
-        if not os.path.exists(species_dir):
-            logger.error(f"Species directory not found: {species_dir}")
+        species_index = SPECIES_INDEX
+        if species_index is None:
+            logger.error("Species directory not found: %s", SPECIES_DIR)
             return jsonify({
                 'success': False,
                 'message': 'Species directory not found'
             }), 500
         
-        # Try to find image with species name (with various extensions)
-        possible_names = [
-            f"{species_name}.jpg",
-            f"{species_name}.jpeg",
-            f"{species_name}.png",
-            f"{species_name}.JPG",
-            f"{species_name}.JPEG",
-            f"{species_name}.PNG"
-        ]
-        
-        image_path = None
-        for name in possible_names:
-            path = os.path.join(species_dir, name)
-            if os.path.exists(path):
-                image_path = path
-                logger.info(f"Found species image: {path}")
-                break
+        image = species_index.get(species_name)
         
         # Fallback to Unknown_species if not found
-        if not image_path:
-            logger.warning(f"Species image not found for {species_name}, using Unknown_species")
-            unknown_path = os.path.join(species_dir, 'Unknown_species.jpg')
-            if os.path.exists(unknown_path):
-                image_path = unknown_path
-            else:
+        if not image:
+            logger.warning("Species image not found for %s, using Unknown_species", species_name)
+            image = species_index.get('Unknown_species')
+            if not image:
                 return jsonify({
                     'success': False,
                     'message': 'Species image not found'
                 }), 404
         
-        # Send the image file with proper headers
-        with open(image_path, 'rb') as f:
-            image_data = f.read()
-        
-        response = make_response(image_data)
-        response.headers['Content-Type'] = 'image/jpeg'
-        response.headers['Content-Disposition'] = f'inline; filename="{os.path.basename(image_path)}"'
+        # Send the image with proper headers; a matching If-None-Match gets a 304
+        image_name, etag = image
+        response = send_file(
+            os.path.join(SPECIES_DIR, image_name),
+            mimetype='image/jpeg',
+            as_attachment=False,
+            download_name=image_name,
+            etag=etag,
+            conditional=True,
+            max_age=86400
+        )
         response.headers['Access-Control-Allow-Origin'] = '*'
         response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
         response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
-        response.headers['Cache-Control'] = 'public, max-age=3600'
         response.headers['X-Content-Type-Options'] = 'nosniff'
         return response
     
     except Exception as e:
-        logger.error(f"Error retrieving species image: {e}", exc_info=True)
+        logger.error("Error retrieving species image: %s", e, exc_info=True)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -1,96 +1,412 @@
-import os, json, argparse
+import os, json, queue, threading, hashlib, time, uuid
+from concurrent.futures import Future
+from cachetools import LRUCache
+import numpy as np
+import torch
+from torchvision import transforms
+import torchvision.io as torchvision_io
+from efficientnet_pytorch import EfficientNet
+import cv2
 
-# Lazy imports - only import when needed to avoid numpy issues
+# Config - use absolute paths relative to this script's location
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(SCRIPT_DIR, "efficientnet_b0_bat_3_dataset(1).pth")
+CLASSES_PATH = os.path.join(SCRIPT_DIR, "new_3_dataset_classes(1).json")
+# Exported copies of the checkpoint live next to it as efficientnet_b0_bat.<key>.<extension>
+EXPORT_STEM = os.path.join(SCRIPT_DIR, "efficientnet_b0_bat")
+
+# Predictions below this confidence (percent) are reported as 'Unknown species'
+CONFIDENCE_THRESHOLD = float(os.environ.get('BCIT_CONFIDENCE_THRESHOLD', '75.0'))
+
+# ImageNet normalization the model was fine-tuned with
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+# Model state, loaded on the first classify_image call
 _model = None
 _device = None
-_transform = None
+_norm_scale = None
+_norm_shift = None
 _classes = None
+_dtype = None
+_ready = False
+_load_lock = threading.Lock()
+
+# JPEG spectrograms (recognized by their SOI marker, since cached Drive files and uploads don't carry a
+# trustworthy extension) are decoded by torchvision straight to RGB on the model's device
+# (nvJPEG on CUDA, libjpeg-turbo on CPU); anything else goes through cv2
+JPEG_MAGIC = b'\xff\xd8\xff'
+
+# Micro-batching: concurrent classify_image calls share one forward pass
+BATCH_MAX_SIZE = int(os.environ.get('BCIT_BATCH_MAX_SIZE', '16'))
+BATCH_WINDOW_SECONDS = float(os.environ.get('BCIT_BATCH_WINDOW_MS', '10')) / 1000.0
+_predictor = None
+
+# (confidence, class index) per image content digest, so resubmitted spectrograms skip the model.
+# The threshold is applied after the lookup, so trying another threshold never re-runs the backbone.
+RESULT_CACHE_SIZE = int(os.environ.get('BCIT_RESULT_CACHE_SIZE', '1024'))
+_result_cache = LRUCache(maxsize=RESULT_CACHE_SIZE)
+_result_cache_lock = threading.Lock()
+
+# BCIT_COMPILE=1 compiles the model with torch.compile on CUDA (slow first start, faster inference)
+COMPILE_MODEL = os.environ.get('BCIT_COMPILE') == '1'
+
+# BCIT_QUANTIZE=1 quantizes the classifier head to INT8 for CPU inference
+QUANTIZE_MODEL = os.environ.get('BCIT_QUANTIZE') == '1'
+
+# BCIT_ONNX=1 serves the model with onnxruntime (pip install onnxruntime or onnxruntime-gpu);
+# the ONNX file is exported from the checkpoint on first start and reused until the checkpoint changes
+USE_ONNX = os.environ.get('BCIT_ONNX') == '1'
+
+# On CUDA a graph is captured per batch size; a batch runs on the smallest graph that fits it.
+# BATCH_MAX_SIZE is always captured so no micro-batch falls back to eager launches.
+CUDA_GRAPH_BATCH_SIZES = sorted({size for size in (1, 4, 16, 32) if size < BATCH_MAX_SIZE} | {BATCH_MAX_SIZE})
 
 def load_dependencies():
-    """Lazy load all ML dependencies when first needed"""
-    global _model, _device, _transform, _classes, torch, torch_nn, transforms, EfficientNet, cv2, np
+    """Load the classes, model and batch worker when first needed"""
+    global _ready, _predictor, _model, _device, _dtype, _norm_scale, _norm_shift, _classes
     
-    if _model is not None:
+    if _ready:
         return  # Already loaded
     
-    # Import numpy FIRST to ensure it's available
-    import numpy as np
-    # Make sure numpy array operations work
-    np.array([1, 2, 3])  # Test numpy
-    
-    # Now import torch and torchvision
-    import torch
-    import torch.nn as torch_nn
-    from torchvision import transforms
-    from efficientnet_pytorch import EfficientNet
-    import cv2
-    
-    # Config - use absolute paths relative to this script's location
-    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-    MODEL_PATH = os.path.join(SCRIPT_DIR, "efficientnet_b0_bat_3_dataset(1).pth")
-    CLASSES_PATH = os.path.join(SCRIPT_DIR, "new_3_dataset_classes(1).json")
-    
-    # Load classes
-    with open(CLASSES_PATH, 'r', encoding='utf-8') as f:
-        _classes = json.load(f)
-    
-    # Device & transforms
-    _device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    _transform = transforms.Compose([
-        transforms.Resize((224, 224)),
-        transforms.ToTensor(),
-        transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225]),
-    ])
-    
-    # Load model
-    def load_model(model_path, num_classes):
-        model = EfficientNet.from_pretrained('efficientnet-b0')
-        model._fc = torch_nn.Linear(model._fc.in_features, num_classes)
-        try:
-            model.load_state_dict(torch.load(model_path, map_location=_device, weights_only=True))
-        except:
-            model.load_state_dict(torch.load(model_path, map_location=_device, weights_only=False))
-        model.eval().to(_device)
-        return model
+    # Concurrent first requests wait here for a single load instead of each building the model;
+    # _ready is only set once warm-up/graph capture are done, so no request touches the GPU meanwhile
+    with _load_lock:
+        if _ready:
+            return
+        
+        # Load classes
+        with open(CLASSES_PATH, 'r', encoding='utf-8') as f:
+            _classes = json.load(f)
+    
+        # Device & transforms; with ONNX, torch only preprocesses on the CPU and onnxruntime picks the device
+        _device = torch.device("cuda" if torch.cuda.is_available() and not USE_ONNX else "cpu")
+        # Reduced precision on CUDA: FP16 by default, BCIT_CUDA_DTYPE=bfloat16 on GPUs that support it
+        _dtype = torch.float32
+        if _device.type == 'cuda':
+            if os.environ.get('BCIT_CUDA_DTYPE') == 'bfloat16' and torch.cuda.is_bf16_supported():
+                _dtype = torch.bfloat16
+            else:
+                _dtype = torch.float16
+            # Input shapes are fixed, so let cuDNN benchmark once and keep the fastest kernels;
+            # FP32 leftovers (the confidence reduction) may use TF32 on Ampere and newer
+            torch.backends.cudnn.benchmark = True
+            torch.set_float32_matmul_precision("high")
+        # ToTensor's /255 and Normalize folded into one per-channel affine, x * scale + shift,
+        # built once on the device instead of Normalize re-creating mean/std tensors every call
+        mean = torch.tensor(IMAGENET_MEAN, device=_device).view(1, 3, 1, 1)
+        std = torch.tensor(IMAGENET_STD, device=_device).view(1, 3, 1, 1)
+        _norm_scale = 1.0 / (255.0 * std)
+        _norm_shift = -mean / std
+    
+        # Load model
+        def build_model(model_path, num_classes):
+            # Build the bare architecture; the checkpoint supplies every weight,
+            # so the ImageNet weights from from_pretrained() were never needed
+            model = EfficientNet.from_name('efficientnet-b0', num_classes=num_classes)
+            # Zip-format checkpoints (torch.save since 1.6, like ours) hold a plain state_dict and load
+            # with the restricted unpickler; only legacy pickle checkpoints need the full one
+            zip_format = is_zip_checkpoint(model_path)
+            state_dict = torch.load(model_path, map_location=_device, weights_only=zip_format)
+            model.load_state_dict(state_dict)
+            return model.eval().to(_device)
+        
+        def load_onnx_model(model_path, num_classes):
+            import onnxruntime as ort
+            onnx_path = export_path(model_path, 'onnx')
+            if not os.path.exists(onnx_path):
+                model = build_model(model_path, num_classes)
+                # The memory-efficient Swish is a custom autograd function and cannot be exported
+                model.set_swish(memory_efficient=False)
+                # Export beside the final path and rename, so another worker never opens a half-written file
+                tmp_path = f"{onnx_path}.{uuid.uuid4().hex}.tmp"
+                try:
+                    torch.onnx.export(
+                        model, torch.zeros(1, 3, 224, 224), tmp_path,
+                        opset_version=17,
+                        # The TorchScript-based exporter honours dynamic_axes; the dynamo one (the default) does not
+                        dynamo=False,
+                        input_names=['x'],
+                        output_names=['logits'],
+                        dynamic_axes={'x': {0: 'batch'}, 'logits': {0: 'batch'}}
+                    )
+                    os.replace(tmp_path, onnx_path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+            available = ort.get_available_providers()
+            providers = [p for p in ('CUDAExecutionProvider', 'CPUExecutionProvider') if p in available]
+            return OnnxModel(ort.InferenceSession(onnx_path, providers=providers))
+        
+        def load_model(model_path, num_classes):
+            """Return the model ready for inference and whether it was wrapped in torch.compile"""
+            torchscript_path = export_path(model_path, 'ts')
+            if os.environ.get('BCIT_TORCHSCRIPT') == '1' and os.path.exists(torchscript_path):
+                model = torch.jit.load(torchscript_path, map_location=_device)
+            else:
+                model = build_model(model_path, num_classes)
+                if os.environ.get('BCIT_TORCHSCRIPT') == '1':
+                    # The memory-efficient Swish is a custom autograd function and cannot be traced
+                    model.set_swish(memory_efficient=False)
+                    with torch.no_grad():
+                        model = torch.jit.trace(model, torch.zeros(1, 3, 224, 224, device=_device))
+                    # Save beside the final path and rename, so another worker never loads a truncated file
+                    tmp_path = f"{torchscript_path}.{uuid.uuid4().hex}.tmp"
+                    try:
+                        model.save(tmp_path)
+                        os.replace(tmp_path, torchscript_path)
+                    finally:
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+            model.eval()
+            # Channels-last (NHWC) layout suits EfficientNet's depthwise and 1x1 convolutions on
+            # both cuDNN and oneDNN; on CUDA the weights also drop to half precision for Tensor Cores
+            model = model.to(memory_format=torch.channels_last, dtype=_dtype)
+            if _device.type == 'cpu' and QUANTIZE_MODEL and not isinstance(model, torch.jit.ScriptModule):
+                # Dynamic quantization only covers Linear layers (Conv2d needs static calibration),
+                # which in EfficientNet-B0 is the final classifier
+                model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            if _device.type == 'cuda' and COMPILE_MODEL and not isinstance(model, torch.jit.ScriptModule):
+                # Plain Swish keeps the whole forward pass in one graph
+                model.set_swish(memory_efficient=False)
+                return torch.compile(model, mode="reduce-overhead", fullgraph=True), True
+            return model, False
+    
+        if USE_ONNX:
+            _model, compiled = load_onnx_model(MODEL_PATH, len(_classes)), False
+        else:
+            _model, compiled = load_model(MODEL_PATH, len(_classes))
+        predictor = BatchedPredictor(_model, BATCH_MAX_SIZE, BATCH_WINDOW_SECONDS)
+        compiled_sizes = ()
+        if _device.type == 'cuda':
+            if compiled:
+                # reduce-overhead already records and replays CUDA graphs, so only warm it up
+                compiled_sizes = CUDA_GRAPH_BATCH_SIZES
+            else:
+                predictor.capture_cuda_graphs(CUDA_GRAPH_BATCH_SIZES)
+        predictor.start(compiled_sizes)
+        _predictor = predictor
+        _ready = True
+
+def export_path(model_path, extension):
+    """
+    Path of an exported copy of the checkpoint. The name carries a key from the checkpoint's size and
+    mtime, so replacing the checkpoint makes the old export stale instead of silently reusing it.
+    """
+    stat = os.stat(model_path)
+    key = hashlib.sha1(f"{stat.st_size}-{stat.st_mtime_ns}".encode('utf-8')).hexdigest()[:12]
+    return f"{EXPORT_STEM}.{key}.{extension}"
+
+def is_zip_checkpoint(path):
+    """Whether a checkpoint uses torch.save's zip format rather than the legacy raw pickle"""
+    with open(path, 'rb') as f:
+        return f.read(4) == b'PK\x03\x04'
+
+def _preprocess(img):
+    """uint8 RGB CHW image -> normalized 1x3x224x224 batch in channels-last layout and the inference dtype"""
+    # Antialiased resize while still uint8 (vectorized fast path), then one fused multiply-add
+    img = transforms.functional.resize(img, [224, 224], antialias=True).unsqueeze(0)
+    x = torch.addcmul(_norm_shift, img.float(), _norm_scale)
+    return x.to(memory_format=torch.channels_last, dtype=_dtype)
+
+def _top_class(logits):
+    """
+    Return (confidences, indices) of the most likely class for each row of logits.
+    Softmax is monotonic, so the winner is the largest logit and only its probability is needed:
+    exp(max - max) / sum(exp(logits - max)) = 1 / sum(exp(logits - max)). Computed in FP32.
+    """
+    logits = logits.float()
+    max_logits, indices = logits.max(1)
+    confidences = torch.exp(logits - max_logits.unsqueeze(1)).sum(1).reciprocal()
+    return confidences, indices
+
+class OnnxModel:
+    """An onnxruntime session behind the same call interface as the torch model: NCHW batch in, logits out"""
+    
+    def __init__(self, session):
+        self.session = session
     
-    _model = load_model(MODEL_PATH, len(_classes))
+    def __call__(self, x):
+        logits = self.session.run(None, {'x': x.contiguous().numpy()})[0]
+        return torch.from_numpy(logits)
 
-def classify_image(img_path):
+class BatchedPredictor:
+    """
+    Coalesces concurrent predictions into shared forward passes. Callers queue preprocessed
+    1x3x224x224 tensors; a background thread takes the first waiting tensor, gathers more for
+    up to window_seconds or until max_batch_size, runs them as one batch and resolves each
+    caller's Future with its (confidence, class index).
+    """
+    
+    def __init__(self, model, max_batch_size, window_seconds):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self._queue = queue.Queue()
+        self._graphs = []  # (batch size, graph, static input, static output), smallest first
+        self._compiled_sizes = []  # batch sizes a compiled model was warmed up on, smallest first
+        self._thread = None
+    
+    def capture_cuda_graphs(self, batch_sizes):
+        """Warm up the model and record a forward pass plus _top_class graph for each batch size"""
+        # Graphs are replayed one at a time by the worker thread, so they can share one memory pool
+        pool = torch.cuda.graph_pool_handle()
+        for batch_size in sorted(batch_sizes):
+            static_in = torch.zeros(batch_size, 3, 224, 224, device=_device, dtype=_dtype).contiguous(memory_format=torch.channels_last)
+            # Warm up on a side stream so cuDNN autotuning and allocations happen before capture
+            stream = torch.cuda.Stream()
+            stream.wait_stream(torch.cuda.current_stream())
+            with torch.inference_mode(), torch.cuda.stream(stream):
+                for _ in range(3):
+                    self.model(static_in)
+            torch.cuda.current_stream().wait_stream(stream)
+            graph = torch.cuda.CUDAGraph()
+            with torch.inference_mode(), torch.cuda.graph(graph, pool=pool):
+                static_out = _top_class(self.model(static_in))
+            self._graphs.append((batch_size, graph, static_in, static_out))
+    
+    def start(self, compiled_sizes=()):
+        """
+        Start the background thread that runs queued images through the model. For a compiled
+        model, pass the batch sizes to warm up: the worker compiles each one before serving (its
+        CUDA graphs belong to that thread) and pads every batch up to the next of those sizes.
+        Blocks until warm-up is done and re-raises any error from it.
+        """
+        if self._thread is not None:
+            return
+        self._compiled_sizes = sorted(compiled_sizes)
+        ready = Future()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name='inference-batcher', daemon=True)
+        self._thread.start()
+        ready.result()
+    
+    def predict(self, x):
+        """Queue a preprocessed 1x3x224x224 tensor and wait for its (confidence, class index)"""
+        future = Future()
+        self._queue.put((x, future))
+        return future.result()
+    
+    def _collect(self):
+        """Block for the first queued item, then gather more until the window closes or the batch is full"""
+        batch = [self._queue.get()]
+        # The window is a deadline from the first item, so a steady trickle can't keep extending it
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _forward(self, x):
+        """Return (confidences, indices) tensors for a batch, replaying a captured graph when one fits"""
+        count = x.shape[0]
+        if self._compiled_sizes:
+            # Only run the shapes compiled at startup, so a new batch size never triggers a recompile
+            padded = next(size for size in self._compiled_sizes if size >= count)
+            if padded > count:
+                x = torch.cat([x, x.new_zeros(padded - count, *x.shape[1:])], dim=0)
+                x = x.contiguous(memory_format=torch.channels_last)
+            confidences, indices = _top_class(self.model(x))
+            return confidences[:count], indices[:count]
+        for batch_size, graph, static_in, static_out in self._graphs:
+            if batch_size >= count:
+                # Rows past count keep stale inputs; each row is classified independently
+                static_in[:count].copy_(x)
+                graph.replay()
+                confidences, indices = static_out
+                return confidences[:count], indices[:count]
+        return _top_class(self.model(x))
+    
+    def _warm_up(self):
+        """Compile and record the model for each compiled batch size on this thread"""
+        with torch.inference_mode():
+            for batch_size in self._compiled_sizes:
+                dummy = torch.zeros(batch_size, 3, 224, 224, device=_device, dtype=_dtype).contiguous(memory_format=torch.channels_last)
+                for _ in range(3):
+                    self._forward(dummy)
+        if self._compiled_sizes:
+            torch.cuda.synchronize()
+    
+    def _run(self, ready):
+        try:
+            self._warm_up()
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(None)
+        while True:
+            batch = self._collect()
+            try:
+                with torch.inference_mode():
+                    confidences, indices = self._forward(torch.cat([item[0] for item in batch], dim=0))
+                    # One device-to-host copy (and sync) for the whole batch; class indices are exact in FP32
+                    rows = torch.stack([confidences, indices.float()], dim=1).cpu().tolist()
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), (confidence, idx) in zip(batch, rows):
+                future.set_result((confidence, int(idx)))
+
+def classify_image(img_path, confidence_threshold=CONFIDENCE_THRESHOLD):
     """
     Classify an image and return the predicted class and confidence.
-    If confidence is below the threshold, return 'Unknown species'.
+    If confidence is below confidence_threshold (percent), return 'Unknown species'.
     """
     # Lazy load dependencies on first call
     load_dependencies()
     
-    # Confidence threshold
-    CONFIDENCE_THRESHOLD = 75.0
-    
-    # Use cv2 to load image (more compatible with numpy than PIL)
-    img_cv = cv2.imread(img_path)
-    if img_cv is None:
-        raise ValueError(f"Failed to load image: {img_path}")
+    # Read the file once: its bytes are both the cache key and the decoder input
+    with open(img_path, 'rb') as f:
+        data = bytearray(f.read())
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    with _result_cache_lock:
+        result = _result_cache.get(digest)
     
-    # Convert BGR to RGB (cv2 loads in BGR by default)
-    img_rgb = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
+    if result is None:
+        img = None
+        if data[:3] == JPEG_MAGIC:
+            # Decode straight to an RGB CHW tensor on the device and resize/normalize there
+            try:
+                img = torchvision_io.decode_jpeg(
+                    torch.frombuffer(data, dtype=torch.uint8),
+                    mode=torchvision_io.ImageReadMode.RGB,
+                    device=_device
+                )
+            except RuntimeError:
+                # nvJPEG rejects some valid files (e.g. CMYK or arithmetic-coded JPEGs); cv2 handles them
+                img = None
+        if img is None:
+            # Use cv2 to decode image (more compatible with numpy than PIL)
+            img_cv = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img_cv is None:
+                raise ValueError(f"Failed to load image: {img_path}")
+            
+            # Convert BGR to RGB (cv2 loads in BGR by default)
+            img_rgb = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
+            
+            # HWC numpy array -> CHW tensor view, moved to the device before resizing
+            img = torch.from_numpy(img_rgb).permute(2, 0, 1)
+            if _device.type == 'cuda':
+                # Stage through page-locked memory so the copy is asynchronous and the transforms queue
+                # behind it on the same stream; torch's caching host allocator reuses the pinned blocks
+                img = img.pin_memory().to(_device, non_blocking=True)
+        
+        # Apply transforms
+        x = _preprocess(img)
+        
+        # Get prediction (batched with any other requests in flight)
+        result = _predictor.predict(x)
+        with _result_cache_lock:
+            _result_cache[digest] = result
     
-    # Convert to PIL for torchvision transforms
-    from PIL import Image as PILImage
-    img_pil = PILImage.fromarray(img_rgb)
-    
-    # Apply transforms
-    x = _transform(img_pil).unsqueeze(0).to(_device)
-   
-    # Get prediction
-    with torch.no_grad():
-        output = _model(x)
-        probs = torch.softmax(output, dim=1)[0]
-        confidence, idx = probs.max(0)
-        confidence_percent = round(confidence.item() * 100, 2)
-        predicted_class = _classes[idx]
+    confidence, idx = result
+    confidence_percent = round(confidence * 100, 2)
+    predicted_class = _classes[idx]
     
     # Check confidence threshold
-    if confidence_percent < CONFIDENCE_THRESHOLD:
+    if confidence_percent < confidence_threshold:
         final_prediction = "Unknown species"
         print(f"Low confidence prediction: {predicted_class} ({confidence_percent}%) -> Returning: {final_prediction}")
     else:
@@ -98,17 +414,3 @@ def classify_image(img_path):
         print(f"High confidence prediction: {predicted_class} ({confidence_percent}%)")
     
     return final_prediction, confidence_percent
-
-# --- CLI Execution Block ---
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description="Classify a bat spectrogram image using EfficientNet.")
-    parser.add_argument('image_path', type=str, help='Path to the spectrogram image file (e.g., spectrogram.jpg)')
-    
-    args = parser.parse_args()
-    
-    prediction, confidence = classify_image(args.image_path)
-    
-    print("\n--- Final Result ---")
-    print(f"Predicted Species: {prediction}")
-    print(f"Confidence: {confidence}%")
-    
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""Classify a spectrogram from the command line; the web app calls classify_image in-process instead."""
+import argparse
+
+from predict import CONFIDENCE_THRESHOLD, classify_image
+
+# --- CLI Execution Block ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Classify a bat spectrogram image using EfficientNet.")
+    parser.add_argument('image_path', type=str, help='Path to the spectrogram image file (e.g., spectrogram.jpg)')
+    parser.add_argument('--threshold', type=float, default=None, help='Confidence percent below which the result is Unknown species')
+    
+    args = parser.parse_args()
+    
+    threshold = CONFIDENCE_THRESHOLD if args.threshold is None else args.threshold
+    prediction, confidence = classify_image(args.image_path, threshold)
+    
+    print("\n--- Final Result ---")
+    print(f"Predicted Species: {prediction}")
+    print(f"Confidence: {confidence}%")